@@ -16,6 +16,10 @@ options = {
     'plotly': 'vue3-plotly',
     'scheduler': 'APScheduler',
     'cgi': 'ApacheのCGI用ファイル',
+    'compression': 'レスポンス圧縮(zstd/Brotli/gzip)',
+    'pools': '共有HTTPクライアントとDB接続プール(httpx/aiosqlite)',
+    'process-pool': 'CPU処理用のプロセスプール',
+    'admission': '流量制御(ロードシェディング)',
 }
 
 app = typer.Typer(add_completion = False)
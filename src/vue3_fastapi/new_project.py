@@ -14,6 +14,10 @@ scheduler_path = resource_path / 'apscheduler'
 fastapi_cgi_path = resource_path / 'fastapi_cgi'
 plotly_path = resource_path / 'plotly'
 vue_router_path = resource_path / 'vue-router'
+compression_path = resource_path / 'compression'
+pools_path = resource_path / 'pools'
+process_pool_path = resource_path / 'process_pool'
+admission_path = resource_path / 'admission'
 
 class NewProject:
     def __init__(
@@ -39,6 +43,10 @@ class NewProject:
         self.use_plotly = 'plotly' in self.use_options
         self.use_scheduler = 'scheduler' in self.use_options
         self.use_cgi = 'cgi' in self.use_options
+        self.use_compression = 'compression' in self.use_options
+        self.use_pools = 'pools' in self.use_options
+        self.use_process_pool = 'process-pool' in self.use_options
+        self.use_admission = 'admission' in self.use_options
 
     def create(self):
         # avoid warning: `VIRTUAL_ENV=/.../.venv` does not match the project environment path `.venv` and will be ignored
@@ -64,6 +72,14 @@ class NewProject:
             if self.use_cgi:
                 self.__copy_fastapi_cgi_files()
                 self.__modify_fastapi_cgi_tasks_json()
+            if self.use_compression:
+                self.__copy_compression_files()
+            if self.use_pools:
+                self.__copy_pools_files()
+            if self.use_process_pool:
+                self.__copy_process_pool_files()
+            if self.use_admission:
+                self.__copy_admission_files()
             self.__init_git()
             self.__finalize_backend()
         except Exception as e:
@@ -79,20 +95,51 @@ class NewProject:
             'additional_imports': '', 
             'lifespan_init': '', 
             'lifespan_exit': '', 
+            'additional_middlewares': '', 
+            'additional_settings': '', 
         }
 
         additional_imports = ''
         lifespan_init = ''
         lifespan_exit = ''
+        additional_middlewares = ''
+        additional_settings = ''
 
         if self.use_scheduler:
             additional_imports += 'from . import scheduler\n'
             lifespan_init += '    scheduler.start()\n'
             lifespan_exit += '    scheduler.stop()\n'
 
+        if self.use_compression:
+            additional_imports += 'from . import compression\n'
+            additional_settings += util.read_file_with_variables(compression_path / 'settings.py', self.variables)
+            additional_middlewares += '    # レスポンス圧縮\n'
+            additional_middlewares += '    app.add_middleware(compression.CompressionMiddleware)\n\n'
+
+        if self.use_admission:
+            # NOTE: 後から追加したミドルウェアほど外側になる(圧縮より先に流量制御を行う)
+            additional_imports += 'from . import admission\n'
+            additional_settings += util.read_file_with_variables(admission_path / 'settings.py', self.variables)
+            additional_middlewares += '    # 流量制御(ロードシェディング)\n'
+            additional_middlewares += '    app.add_middleware(admission.AdmissionMiddleware)\n\n'
+
+        if self.use_pools:
+            additional_imports += 'from . import pools\n'
+            additional_settings += util.read_file_with_variables(pools_path / 'settings.py', self.variables)
+            lifespan_init += '    await pools.start(app)\n'
+            lifespan_exit += '    await pools.stop(app)\n'
+
+        if self.use_process_pool:
+            additional_imports += 'from . import process_pool\n'
+            additional_settings += util.read_file_with_variables(process_pool_path / 'settings.py', self.variables)
+            lifespan_init += '    await process_pool.start()\n'
+            lifespan_exit += '    await process_pool.stop()\n'
+
         self.variables['additional_imports'] = additional_imports
         self.variables['lifespan_init'] = lifespan_init if lifespan_init else '    pass\n'
         self.variables['lifespan_exit'] = lifespan_exit if lifespan_exit else '    pass\n'
+        self.variables['additional_middlewares'] = additional_middlewares
+        self.variables['additional_settings'] = additional_settings
 
     def __create_project_dir(self):
         print(f'[green]新規プロジェクトのフォルダーを作成します:[/green] {self.project_dir}')
@@ -125,6 +172,7 @@ class NewProject:
         for file in project_template_path.glob('*'):
             if file.is_file():
                 util.copy_file_with_variables(file, self.project_dir / file.name, self.variables)
+        util.copy_dir_with_variables(project_template_path / 'scripts', self.project_dir / 'scripts', self.variables)
 
     def __wget_gitignore(self):
         print('[green].gitignoreをダウンロードします。[/green]')
@@ -172,6 +220,18 @@ class NewProject:
                 cwd=backend_dir, 
                 check=True,
             )
+        if self.use_compression:
+            subprocess.run(
+                ['uv', 'add', 'brotli', 'zstandard'], 
+                cwd=backend_dir, 
+                check=True,
+            )
+        if self.use_pools:
+            subprocess.run(
+                ['uv', 'add', 'httpx', 'aiosqlite'], 
+                cwd=backend_dir, 
+                check=True,
+            )
         self.__copy_backend_files()
         self.__add_lines_to_backend_gitignore()
         self.__modify_backend_pyproject_toml()
@@ -188,6 +248,8 @@ class NewProject:
         gitignore = self.project_dir / 'backend/.gitignore'
         with open(gitignore, 'a') as f:
             f.write('\npublic/\n')
+            if self.use_pools:
+                f.write('*.sqlite3*\n')    # WALモードの-wal/-shmファイルを含む
 
     def __modify_backend_pyproject_toml(self):
         print('[green]backend/pyproject.tomlを修正します。[/green]')
@@ -361,6 +423,30 @@ pattern = '(?P<base>\\d+\\.\\d+\\.\\d+)'
         dst_dir = self.project_dir / 'backend/src' / self.package_name
         util.copy_dir_with_variables(src_dir, dst_dir, self.variables)
 
+    def __copy_compression_files(self):
+        print('[green]レスポンス圧縮の設定を行います。[/green]')
+        src_dir = compression_path / 'src/project_name'
+        dst_dir = self.project_dir / 'backend/src' / self.package_name
+        util.copy_dir_with_variables(src_dir, dst_dir, self.variables)
+
+    def __copy_pools_files(self):
+        print('[green]共有HTTPクライアントとDB接続プールの設定を行います。[/green]')
+        src_dir = pools_path / 'src/project_name'
+        dst_dir = self.project_dir / 'backend/src' / self.package_name
+        util.copy_dir_with_variables(src_dir, dst_dir, self.variables)
+
+    def __copy_process_pool_files(self):
+        print('[green]プロセスプールの設定を行います。[/green]')
+        src_dir = process_pool_path / 'src/project_name'
+        dst_dir = self.project_dir / 'backend/src' / self.package_name
+        util.copy_dir_with_variables(src_dir, dst_dir, self.variables)
+
+    def __copy_admission_files(self):
+        print('[green]流量制御の設定を行います。[/green]')
+        src_dir = admission_path / 'src/project_name'
+        dst_dir = self.project_dir / 'backend/src' / self.package_name
+        util.copy_dir_with_variables(src_dir, dst_dir, self.variables)
+
     def __copy_fastapi_cgi_files(self):
         print('[green]CGI用ファイルをコピーします。[/green]')
         src_dir = fastapi_cgi_path / 'cgi'
@@ -0,0 +1,11 @@
+# settings.pyに追加する設定(流量制御)
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 100))  # 同時に処理するリクエスト数の上限(ワーカープロセスごと)
+ADMISSION_MIN_IN_FLIGHT = int(os.environ.get('ADMISSION_MIN_IN_FLIGHT', 4))  # AIMDで調整する上限の最小値
+ADMISSION_API_LIMIT = int(os.environ.get('ADMISSION_API_LIMIT', 80))  # /api/へのリクエストを同時に処理する数の上限
+ADMISSION_FRONTEND_LIMIT = int(os.environ.get('ADMISSION_FRONTEND_LIMIT', 40))  # frontendへのリクエストを同時に処理する数の上限
+ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 100))  # 処理の開始を待つリクエスト数の上限(api/frontendのグループごと)
+ADMISSION_DEADLINE = float(os.environ.get('ADMISSION_DEADLINE', 5))  # リクエストの到着から処理を終えるまでの期限(秒)
+ADMISSION_TARGET_LATENCY = float(os.environ.get('ADMISSION_TARGET_LATENCY', 0.5))  # 目標の処理時間(秒)。超えると上限を減らす
+ADMISSION_DECREASE_FACTOR = float(os.environ.get('ADMISSION_DECREASE_FACTOR', 0.9))  # 上限を減らすときの倍率
+ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 1))  # 503のRetry-After(秒)
+ADMISSION_EXEMPT_PATHS = os.environ.get('ADMISSION_EXEMPT_PATHS', '/api/v1/metrics')  # 流量制御の対象外のパス(カンマ区切り)
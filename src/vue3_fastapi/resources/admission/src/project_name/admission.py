@@ -0,0 +1,226 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from collections import deque
+import asyncio
+from .common import metrics
+from .common import settings
+from .common.logger import logger
+
+'''
+    # 同時に処理するリクエスト数を制限し、過負荷時には503を返すASGIミドルウェア。
+    # - ワーカープロセス全体の上限(ADMISSION_MAX_IN_FLIGHT)と、ルートグループ(api/frontend)ごとの上限を設ける
+    # - 上限を超えたリクエストはグループごとの待ち行列(ADMISSION_QUEUE_SIZE)で待機し、
+    #   期限(到着からADMISSION_DEADLINE秒)までに処理を終えられない見込みになったら待たずに503を返す
+    # - 全体の上限は処理時間に応じてAIMDで調整する
+    #   (ADMISSION_TARGET_LATENCY以下なら少しずつ増やし、超えたらADMISSION_DECREASE_FACTOR倍に減らす)
+    # - /api/v1/batchはscope['admission']の_Leaseでサブリクエスト数の枠を確保する
+'''
+
+class _Waiter:
+    def __init__(self, future: asyncio.Future, group: str, weight: int, deadline: float):
+        self.future = future
+        self.group = group
+        self.weight = weight
+        self.deadline = deadline
+
+class AdmissionController:
+    def __init__(self):
+        self.min_limit = max(1, settings.ADMISSION_MIN_IN_FLIGHT)
+        self.max_limit = max(self.min_limit, settings.ADMISSION_MAX_IN_FLIGHT)
+        self.limit = float(self.max_limit)
+        self.group_limits = {
+            'api': settings.ADMISSION_API_LIMIT, 
+            'frontend': settings.ADMISSION_FRONTEND_LIMIT, 
+        }
+        self.in_flight = 0
+        self.group_in_flight = {group: 0 for group in self.group_limits}
+        self.waiters: deque[_Waiter] = deque()
+        self.expected_latency = 0.0     # 処理時間の指数移動平均(秒)
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+
+    def _can_admit(self, group: str, weight: int) -> bool:
+        return (self.in_flight + weight <= int(self.limit)
+                and self.group_in_flight[group] + weight <= self.group_limits[group])
+
+    def _admit(self, group: str, weight: int):
+        self.in_flight += weight
+        self.group_in_flight[group] += weight
+        self.admitted += 1
+
+    def _waiting(self, group: str) -> int:
+        return sum(1 for waiter in self.waiters if waiter.group == group)
+
+    def clip(self, group: str, weight: int) -> int:
+        '''確保する枠の数を、上限を超えない範囲(1以上)に切り詰めます。'''
+        return max(1, min(weight, int(self.limit), self.group_limits[group]))
+
+    def _wake(self):
+        '''空きができたら待ち行列の先頭から処理を開始させ、期限に間に合わない待機は503にします。
+        グループの上限に達している待機は飛ばし、他のグループの待機を先に開始させます。'''
+        now = asyncio.get_running_loop().time()
+        for waiter in list(self.waiters):
+            if waiter.future.done():
+                self.waiters.remove(waiter)
+            elif now + self.expected_latency > waiter.deadline:
+                self.waiters.remove(waiter)
+                waiter.future.set_result(False)
+            elif self._can_admit(waiter.group, waiter.weight):
+                self.waiters.remove(waiter)
+                self._admit(waiter.group, waiter.weight)
+                waiter.future.set_result(True)
+            elif self.in_flight + waiter.weight > int(self.limit):
+                break
+
+    async def acquire(self, group: str, weight: int = 1) -> bool:
+        '''weight個の枠を確保して処理を開始できればTrue、503を返す場合はFalseを返します。'''
+        # 同じグループの待機がなければ、他のグループの待機を追い越して処理を開始する
+        # (他のグループが上限に達していても、このグループの処理は止めない)
+        if self._waiting(group) == 0 and self._can_admit(group, weight):
+            self._admit(group, weight)
+            return True
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        deadline = now + settings.ADMISSION_DEADLINE
+        self._wake()    # 期限切れの待機を取り除く
+        # 待ち行列の上限はグループごとに判定する(apiの待機でfrontendが503にならないようにする)
+        if self._waiting(group) >= settings.ADMISSION_QUEUE_SIZE:
+            self.rejected_queue_full += 1
+            return False
+        if now + self.expected_latency > deadline:
+            self.rejected_deadline += 1
+            return False
+
+        waiter = _Waiter(loop.create_future(), group, weight, deadline)
+        self.waiters.append(waiter)
+        self.queued += 1
+        self._wake()    # 空きがあればすぐに処理を開始する
+        try:
+            admitted = await asyncio.wait_for(waiter.future, timeout=deadline - self.expected_latency - now)
+        except TimeoutError:
+            admitted = waiter.future.done() and not waiter.future.cancelled() and waiter.future.result()
+        except asyncio.CancelledError:
+            # 処理開始と同時にクライアントが切断した場合は枠を返す
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.result():
+                self.release(group, None, weight)
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        if not admitted:
+            self.rejected_deadline += 1
+        return admitted
+
+    def release(self, group: str, latency: float | None, weight: int = 1):
+        '''処理が終了したら呼び出し、処理時間(秒)から全体の上限を調整します。'''
+        self.in_flight -= weight
+        self.group_in_flight[group] -= weight
+        if latency is not None:
+            self._adjust(latency)
+        self._wake()
+
+    def _adjust(self, latency: float):
+        self.expected_latency = latency if self.expected_latency == 0.0 else 0.8 * self.expected_latency + 0.2 * latency
+        now = asyncio.get_running_loop().time()
+        if latency > settings.ADMISSION_TARGET_LATENCY:
+            # 減少は目標処理時間ごとに1回までにする(同時に終了したリクエストで一気に減らさない)
+            if now - self._last_decrease >= settings.ADMISSION_TARGET_LATENCY:
+                self._last_decrease = now
+                self.limit = max(float(self.min_limit), self.limit * settings.ADMISSION_DECREASE_FACTOR)
+                logger.debug(f'admission limit decreased: {self.limit=:.1f} {latency=:.3f}')
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def statistics(self) -> dict:
+        return {
+            'limit': int(self.limit), 
+            'min_limit': self.min_limit, 
+            'max_limit': self.max_limit, 
+            'in_flight': self.in_flight, 
+            'group_in_flight': dict(self.group_in_flight), 
+            'group_limits': dict(self.group_limits), 
+            'waiting': len(self.waiters), 
+            'expected_latency': self.expected_latency, 
+            'admitted': self.admitted, 
+            'queued': self.queued, 
+            'rejected_queue_full': self.rejected_queue_full, 
+            'rejected_deadline': self.rejected_deadline, 
+        }
+
+# MARK: lease
+class _Lease:
+    '''リクエストが確保している枠。scope['admission']に格納する。'''
+    def __init__(self, controller: AdmissionController, group: str):
+        self.controller = controller
+        self.group = group
+        self.weight = 1
+
+    async def reserve(self, weight: int) -> int:
+        '''確保する枠をweight個に増やし、確保した枠の数を返します(/api/v1/batchのサブリクエスト数など)。
+        上限を超える場合は上限まで切り詰めるため、呼び出し側は同時実行数を戻り値以下にすること。
+        確保できない場合は503のHTTPExceptionになります。'''
+        weight = self.controller.clip(self.group, weight)
+        if weight <= self.weight:
+            return self.weight
+        # 枠を持ったまま追加の枠を待つと、バッチ同士が枠を取り合って進まなくなるため、
+        # いったん枠を返してからweight個の枠を確保し直す
+        self.controller.release(self.group, None, self.weight)
+        self.weight = 0
+        if not await self.controller.acquire(self.group, weight):
+            raise HTTPException(
+                status_code=503, 
+                detail='Service Unavailable', 
+                headers={'Retry-After': str(settings.ADMISSION_RETRY_AFTER)}, 
+            )
+        self.weight = weight
+        return weight
+
+# MARK: middleware
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.controller = AdmissionController()
+        self.exempt_paths = tuple(i.strip() for i in settings.ADMISSION_EXEMPT_PATHS.split(',') if i.strip())
+        metrics.register('admission', self.controller.statistics)
+
+    def _route_path(self, scope: Scope) -> str:
+        path: str = scope['path']
+        root_path: str = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # /api/v1/batchのサブリクエストの枠は、親のリクエストが_Lease.reserve()で確保済み
+        if scope['type'] != 'http' or scope.get('batch_subrequest'):
+            await self.app(scope, receive, send)
+            return
+        path = self._route_path(scope)
+        if path.startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        group = 'api' if path == '/api' or path.startswith('/api/') else 'frontend'
+        if not await self.controller.acquire(group):
+            response = JSONResponse(
+                {'detail': 'Service Unavailable'}, 
+                status_code=503, 
+                headers={'Retry-After': str(settings.ADMISSION_RETRY_AFTER)}, 
+            )
+            await response(scope, receive, send)
+            return
+
+        lease = _Lease(self.controller, group)
+        scope['admission'] = lease
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if lease.weight > 0:
+                self.controller.release(group, loop.time() - start, lease.weight)
@@ -0,0 +1,7 @@
+# settings.pyに追加する設定(レスポンス圧縮)
+COMPRESSION_ENCODINGS = os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip')  # レスポンス圧縮で使うエンコーディング(優先順、カンマ区切り)
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 1024))  # このサイズ(バイト)未満のレスポンスは圧縮しない
+COMPRESSION_OFFLOAD_SIZE = int(os.environ.get('COMPRESSION_OFFLOAD_SIZE', 256 * 1024))  # このサイズ(バイト)以上のデータはスレッドプールで圧縮する
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
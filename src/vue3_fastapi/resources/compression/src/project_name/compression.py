@@ -0,0 +1,266 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import anyio.to_thread
+import time
+import zlib
+from .common import metrics
+from .common import settings
+from .common.logger import logger
+
+'''
+    # Accept-Encodingに応じてレスポンスをzstd/Brotli/gzipで圧縮するASGIミドルウェア。
+    # - COMPRESSION_MINIMUM_SIZE未満のレスポンスは圧縮しない(サイズが分かるレスポンスだけで判定する)
+    # - StreamingResponseはバッファリングせずに、チャンクごとに圧縮してフラッシュする
+    # - Server-Sent Events(text/event-stream)は圧縮しない
+    # - COMPRESSION_OFFLOAD_SIZE以上のデータはスレッドプールで圧縮し、イベントループをブロックしない
+    # - Content-Encodingが設定済みのレスポンス(圧縮済みの静的ファイルなど)はそのまま返す
+    # - Rangeリクエストへの206 Partial Contentは圧縮しない(Content-Rangeが圧縮前のバイト位置を指すため)
+'''
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 圧縮しないContent-Type(イベントごとに届く必要があるため)
+_excluded_types = ('text/event-stream', )
+
+# 圧縮対象のContent-Type
+_compressible_types = (
+    'text/', 
+    'application/json', 
+    'application/javascript', 
+    'application/xml', 
+    'application/wasm', 
+    'image/svg+xml', 
+)
+
+class _Compressor:
+    '''圧縮アルゴリズムの違いを吸収するクラス'''
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self._obj = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+            self._compress = self._obj.compress
+            self._flush = lambda: self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = self._obj.flush
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._compress = self._obj.process
+            self._flush = self._obj.flush
+            self._finish = self._obj.finish
+        else:
+            self._obj = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = self._obj.compress
+            self._flush = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._obj.flush
+
+    def step(self, data: bytes, final: bool) -> tuple[bytes, float]:
+        '''dataを圧縮し、圧縮結果と圧縮に要したCPU時間(秒)を返します。'''
+        start = time.thread_time()
+        result = self._compress(data) + (self._finish() if final else self._flush())
+        return result, time.thread_time() - start
+
+def available_encodings() -> list[str]:
+    '''COMPRESSION_ENCODINGSのうち、利用可能なエンコーディングを優先順に返します。'''
+    result = []
+    for encoding in [i.strip() for i in settings.COMPRESSION_ENCODINGS.split(',') if i.strip()]:
+        if encoding == 'zstd' and zstandard is None:
+            continue
+        if encoding == 'br' and brotli is None:
+            continue
+        if encoding not in ('zstd', 'br', 'gzip'):
+            logger.warning(f'unknown compression encoding: {encoding}')
+            continue
+        result.append(encoding)
+    return result
+
+def negotiate(accept_encoding: str, encodings: list[str]) -> str | None:
+    '''Accept-Encodingのq値とサーバーの優先順からエンコーディングを選択します。'''
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    candidates = [i for i in encodings if accepted.get(i, 0.0) > 0.0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda i: (accepted[i], -encodings.index(i)))
+
+# MARK: statistics
+_stats: dict[str, dict[str, float]] = {}
+
+def _record(route: str, encoding: str, bytes_in: int, bytes_out: int, cpu_time: float):
+    stats = _stats.setdefault(route, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_time': 0.0})
+    stats['responses'] += 1
+    stats['bytes_in'] += bytes_in
+    stats['bytes_out'] += bytes_out
+    stats['cpu_time'] += cpu_time
+    stats[f'responses_{encoding}'] = stats.get(f'responses_{encoding}', 0) + 1
+
+def statistics() -> dict:
+    '''ルートごとの圧縮率(圧縮後/圧縮前)とCPU時間を返します。'''
+    result = {}
+    for route, stats in _stats.items():
+        result[route] = {
+            **stats, 
+            'ratio': stats['bytes_out'] / stats['bytes_in'] if stats['bytes_in'] else 1.0, 
+        }
+    return result
+
+metrics.register('compression', statistics)
+
+# MARK: middleware
+class CompressionMiddleware:
+    def __init__(
+            self, 
+            app: ASGIApp, 
+            minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE, 
+            offload_size: int = settings.COMPRESSION_OFFLOAD_SIZE, 
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.encodings = available_encodings()
+        logger.debug(f'CompressionMiddleware {self.encodings=}')
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Message | None = None
+        self.mode: str | None = None    # None: 判定前, 'passthrough': 圧縮しない, 'stream': ストリーミング圧縮
+        self.compressor: _Compressor | None = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+
+    def _is_compressible(self, headers: Headers) -> bool:
+        if self.start_message['status'] < 200 or self.start_message['status'] in (204, 206, 304):
+            return False
+        if 'content-encoding' in headers or 'content-range' in headers:
+            return False
+        content_type = headers.get('content-type', '').lower()
+        if content_type.startswith(_excluded_types):
+            return False
+        return content_type.startswith(_compressible_types)
+
+    def _is_too_small(self, headers: Headers) -> bool:
+        '''Content-Lengthが分かっていて、最小サイズ未満ならTrueを返します。'''
+        content_length = headers.get('content-length', '')
+        return content_length.isdigit() and int(content_length) < self.middleware.minimum_size
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= self.middleware.offload_size:
+            result, cpu_time = await anyio.to_thread.run_sync(self.compressor.step, data, final)
+        else:
+            result, cpu_time = self.compressor.step(data, final)
+        self.bytes_in += len(data)
+        self.bytes_out += len(result)
+        self.cpu_time += cpu_time
+        return result
+
+    def _record(self):
+        route = self.scope.get('route')
+        _record(getattr(route, 'path', self.scope['path']), self.encoding, self.bytes_in, self.bytes_out, self.cpu_time)
+
+    def _compressed_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=list(self.start_message['headers']))
+        headers['content-encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        # 圧縮後のボディは元のボディとバイト単位で一致しないため、強いETagは弱いETagにする
+        etag = headers.get('etag')
+        if etag is not None and not etag.startswith('W/'):
+            headers['etag'] = 'W/' + etag
+        self.start_message['headers'] = headers.raw
+        return headers
+
+    async def _passthrough(self, vary: bool):
+        '''圧縮せずに、保留中のレスポンス開始を送信します。'''
+        self.mode = 'passthrough'
+        if vary:
+            # Accept-Encodingによっては圧縮されるレスポンスのため、キャッシュ用にVaryを付ける
+            headers = MutableHeaders(raw=list(self.start_message['headers']))
+            headers.add_vary_header('Accept-Encoding')
+            self.start_message['headers'] = headers.raw
+        await self._send(self.start_message)
+
+    async def send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            headers = Headers(raw=message['headers'])
+            if not self._is_compressible(headers):
+                await self._passthrough(vary=False)
+            elif self._is_too_small(headers):
+                await self._passthrough(vary=True)
+            return
+
+        if self.start_message is None:
+            # 103 Early Hintsなどレスポンス開始前のメッセージはそのまま送信する
+            await self._send(message)
+            return
+
+        if self.mode == 'passthrough' or message['type'] != 'http.response.body':
+            if self.mode is None:
+                await self._passthrough(vary=True)
+            await self._send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.mode == 'stream':
+            data = await self._compress(body, final=not more_body)
+            await self._send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+            if not more_body:
+                self._record()
+            return
+
+        # 1回で送信されるボディで、Content-Lengthがなく最小サイズ未満なら圧縮しない
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self._passthrough(vary=True)
+            await self._send(message)
+            return
+
+        self.compressor = _Compressor(self.encoding)
+        headers = self._compressed_headers()
+        if more_body:
+            # ストリーミング: バッファリングせずに、Content-Lengthを削除してチャンクごとに圧縮する
+            self.mode = 'stream'
+            del headers['content-length']
+            await self._send(self.start_message)
+            data = await self._compress(body, final=False)
+            await self._send({'type': 'http.response.body', 'body': data, 'more_body': True})
+        else:
+            data = await self._compress(body, final=True)
+            headers['content-length'] = str(len(data))
+            await self._send(self.start_message)
+            await self._send({'type': 'http.response.body', 'body': data, 'more_body': False})
+            self._record()
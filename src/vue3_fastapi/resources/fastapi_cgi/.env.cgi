@@ -1,2 +1,2 @@
-BASE_URL=/{{:新規作成するプロジェクト名:}}/index.cgi
-BUILD_DIR=../backend/src/{{:Pythonパッケージ名:}}/public
+BASE_URL=/{{:新規作成するプロジェクト名:}}/
+BUILD_DIR=../cgi/dist
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+'''frontend/.env.cgiのBASE_URLとcgi/.htaccess、cgi/index.cgiのベースパスが一致しているか確認します。'''
+from pathlib import Path
+import re
+import sys
+
+cgi_dir = Path(__file__).resolve().parent
+project_dir = cgi_dir.parent
+
+def read_base_url(env_path: Path) -> str | None:
+    for line in env_path.read_text(encoding='utf-8').splitlines():
+        key, _, value = line.partition('=')
+        if key.strip() == 'BASE_URL':
+            return value.strip().strip('"\'')
+    return None
+
+def main() -> int:
+    base_url = read_base_url(project_dir / 'frontend/.env.cgi')
+    m = re.search(r'^\s*RewriteBase\s+(\S+)', (cgi_dir / '.htaccess').read_text(encoding='utf-8'), re.MULTILINE)
+    rewrite_base = m.group(1) if m else None
+    m = re.search(r'''create_app\(base_url=['"]([^'"]*)['"]\)''', (cgi_dir / 'index.cgi').read_text(encoding='utf-8'))
+    cgi_base_url = m.group(1) if m else None
+
+    errors = []
+    if base_url is None:
+        errors.append('frontend/.env.cgi: BASE_URLがありません。')
+    elif not base_url.endswith('/'):
+        errors.append(f'frontend/.env.cgi: BASE_URLは/で終わる必要があります: {base_url}')
+    if rewrite_base is None:
+        errors.append('cgi/.htaccess: RewriteBaseがありません。')
+    elif base_url != rewrite_base:
+        errors.append(f'frontend/.env.cgiのBASE_URL({base_url})とcgi/.htaccessのRewriteBase({rewrite_base})が一致しません。')
+    if rewrite_base is not None and cgi_base_url != rewrite_base + 'index.cgi':
+        errors.append(f'cgi/index.cgiのbase_url({cgi_base_url})は{rewrite_base}index.cgiにしてください。')
+
+    for error in errors:
+        print(error, file=sys.stderr)
+    if not errors:
+        print(f'BASE_URL: {base_url}')
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
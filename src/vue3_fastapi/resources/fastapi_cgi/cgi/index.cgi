@@ -4,7 +4,8 @@ from wsgiref.handlers import CGIHandler
 from {{:Pythonパッケージ名:}} import create_app
 from a2wsgi import ASGIMiddleware
 
-# .htaccessでパスを書き換えて、FastAPIには`/{{:新規作成するプロジェクト名:}}/index.cgi/パス`が渡される
+# .htaccessで`/{{:新規作成するプロジェクト名:}}/api/`のパスだけを書き換えて、FastAPIには`/{{:新規作成するプロジェクト名:}}/index.cgi/api/パス`が渡される
+# SPAのパスと静的ファイルはApacheが直接返す
 app = create_app(base_url='/{{:新規作成するプロジェクト名:}}/index.cgi')
 app = ASGIMiddleware(app)
 
@@ -0,0 +1,8 @@
+# settings.pyに追加する設定(共有HTTPクライアントとDB接続プール)
+HTTP_POOL_MAX_CONNECTIONS = int(os.environ.get('HTTP_POOL_MAX_CONNECTIONS', 100))  # 共有HTTPクライアントの最大接続数
+HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS', 20))  # 共有HTTPクライアントで維持する接続数
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))  # 共有HTTPクライアントのタイムアウト(秒)
+DATA_DIR = Path(os.environ.get('DATA_DIR', '.')).resolve()  # データベースなどを保存する書き込み可能なフォルダー
+DATABASE_PATH = os.environ.get('DATABASE_PATH', str(DATA_DIR / 'data.sqlite3'))  # SQLiteのデータベースファイル
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))  # DB接続プールの最大接続数
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # DB接続プールから接続を取得するまでの最大待ち時間(秒)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from pathlib import Path
+from ...pools import Database
+
+def create_router(base_path: Path) -> APIRouter:
+    # MARK: /api/v1/pools-example
+    router = APIRouter(prefix="/pools-example", tags=['pools-example'])
+
+    # MARK: /api/v1/pools-example/sqlite-version
+    # NOTE: DB接続はリクエストごとに作成せず、lifespanで作成した接続プールから取得する。
+    #       外部APIを呼び出す場合は`client: HttpClient`を引数に追加すると共有のhttpx.AsyncClientを受け取れる。
+    @router.get("/sqlite-version")
+    async def get_sqlite_version(db: Database):
+        async with db.execute('SELECT sqlite_version()') as cursor:
+            row = await cursor.fetchone()
+        return {"sqlite_version": row[0]}
+
+    return router
@@ -0,0 +1,225 @@
+from fastapi import Depends, FastAPI, HTTPException, Request
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator
+import aiosqlite
+import asyncio
+import httpx
+import time
+from .common import metrics
+from .common import settings
+from .common.logger import logger
+
+'''
+    # lifespanで作成し、app.stateに格納する共有リソース。
+    # - app.state.http_client: 共有のhttpx.AsyncClient(コネクションを再利用する)
+    # - app.state.db_pool: aiosqliteの接続プール
+    # api/v1のモジュールでは依存関係(HttpClient, Database)を使って受け取る。
+
+    from ...pools import Database, HttpClient
+
+    @router.get("/example")
+    async def get_example(db: Database, client: HttpClient):
+        ...
+'''
+
+# MARK: HTTP client
+class _MeteredStream(httpx.AsyncByteStream):
+    '''レスポンスのクローズ時に使用中のリクエスト数を減らすストリーム'''
+    def __init__(self, stream: httpx.AsyncByteStream, transport: '_MeteredTransport'):
+        self._stream = stream
+        self._transport = transport
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._transport.in_flight -= 1
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    '''使用中のリクエスト数を計測するトランスポート'''
+    def __init__(self, limits: httpx.Limits):
+        super().__init__(limits=limits)
+        self.max_connections = limits.max_connections
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        response.stream = _MeteredStream(response.stream, self)
+        return response
+
+    def statistics(self) -> dict:
+        return {
+            'max_connections': self.max_connections, 
+            'in_flight': self.in_flight, 
+            'max_in_flight': self.max_in_flight, 
+            'requests': self.requests, 
+            'utilization': self.in_flight / self.max_connections if self.max_connections else 0.0, 
+        }
+
+# MARK: database
+class DatabasePool:
+    '''aiosqliteの接続プール。最大size個の接続を作成して再利用する。'''
+    def __init__(self, database: str, size: int, timeout: float):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle: list[aiosqlite.Connection] = []
+        self._connections: set[aiosqlite.Connection] = set()    # 作成したすべての接続(使用中を含む)
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._acquired = 0
+        self._wait_time_total = 0.0
+        self._max_wait_time = 0.0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.database)
+        try:
+            # カーソルを閉じないとロックが残り、新規作成したファイルでは2つ目の接続が"database is locked"になる
+            async with connection.execute('PRAGMA journal_mode=WAL'):
+                pass
+        except BaseException:
+            await connection.close()
+            raise
+        self._connections.add(connection)
+        self._created += 1
+        logger.debug(f'DatabasePool connect {self.database=} {self._created=}')
+        return connection
+
+    async def get(self) -> aiosqlite.Connection:
+        '''接続を取得します。timeout秒以内に取得できない場合はTimeoutErrorになります。'''
+        self._waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        finally:
+            self._waiting -= 1
+        wait_time = time.perf_counter() - start
+        self._wait_time_total += wait_time
+        self._max_wait_time = max(self._max_wait_time, wait_time)
+        try:
+            connection = self._idle.pop() if self._idle else await self._connect()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._acquired += 1
+        self._in_use += 1
+        return connection
+
+    async def put(self, connection: aiosqlite.Connection):
+        '''get()で取得した接続をプールに戻します。'''
+        try:
+            if connection.in_transaction:
+                await connection.rollback()
+        except BaseException:
+            # ロールバックできなかった接続は再利用せずに閉じる(閉じないとaiosqliteのスレッドが残る)
+            await self._discard(connection)
+            raise
+        else:
+            self._idle.append(connection)
+        finally:
+            self._in_use -= 1
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        '''async withで接続を取得し、ブロックを抜けるとプールに戻します。'''
+        connection = await self.get()
+        try:
+            yield connection
+        finally:
+            await self.put(connection)
+
+    async def _discard(self, connection: aiosqlite.Connection):
+        self._connections.discard(connection)
+        try:
+            await connection.close()
+        except Exception:
+            logger.exception(f'DatabasePool failed to close a connection {self.database=}')
+
+    async def close(self):
+        '''使用中の接続を含め、作成したすべての接続を閉じます。'''
+        for connection in list(self._connections):
+            await self._discard(connection)
+        self._idle.clear()
+
+    def statistics(self) -> dict:
+        return {
+            'size': self.size, 
+            'created': self._created, 
+            'open': len(self._connections), 
+            'in_use': self._in_use, 
+            'idle': len(self._idle), 
+            'waiting': self._waiting, 
+            'acquired': self._acquired, 
+            'avg_wait_time': self._wait_time_total / self._acquired if self._acquired else 0.0, 
+            'max_wait_time': self._max_wait_time, 
+            'utilization': self._in_use / self.size if self.size else 0.0, 
+        }
+
+# MARK: lifespan
+_http_transport: _MeteredTransport | None = None
+_db_pool: DatabasePool | None = None
+
+async def start(app: FastAPI):
+    '''共有HTTPクライアントとDB接続プールを作成し、app.stateに格納します。'''
+    global _http_transport, _db_pool
+    _http_transport = _MeteredTransport(limits=httpx.Limits(
+        max_connections=settings.HTTP_POOL_MAX_CONNECTIONS, 
+        max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS, 
+    ))
+    app.state.http_client = httpx.AsyncClient(transport=_http_transport, timeout=settings.HTTP_TIMEOUT)
+    _db_pool = DatabasePool(settings.DATABASE_PATH, settings.DB_POOL_SIZE, settings.DB_POOL_TIMEOUT)
+    app.state.db_pool = _db_pool
+    logger.debug(f'pools started {settings.HTTP_POOL_MAX_CONNECTIONS=} {settings.DATABASE_PATH=} {settings.DB_POOL_SIZE=}')
+
+async def stop(app: FastAPI):
+    '''共有HTTPクライアントとDB接続プールを閉じます。'''
+    await app.state.http_client.aclose()
+    await app.state.db_pool.close()
+    logger.debug('pools stopped')
+
+def statistics() -> dict:
+    '''HTTPクライアントとDB接続プールの使用状況を返します。'''
+    return {
+        'http': _http_transport.statistics() if _http_transport else None, 
+        'database': _db_pool.statistics() if _db_pool else None, 
+    }
+
+metrics.register('pools', statistics)
+
+# MARK: dependencies
+# NOTE: syncの依存関係はスレッドプールで実行されるため、app.stateを読むだけでもasync defにする
+async def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
+
+async def get_database(request: Request) -> AsyncIterator[aiosqlite.Connection]:
+    pool: DatabasePool = request.app.state.db_pool
+    try:
+        connection = await pool.get()
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Database pool is exhausted")
+    try:
+        yield connection
+    finally:
+        await pool.put(connection)
+
+HttpClient = Annotated[httpx.AsyncClient, Depends(get_http_client)]
+Database = Annotated[aiosqlite.Connection, Depends(get_database)]
@@ -0,0 +1,5 @@
+# settings.pyに追加する設定(プロセスプール)
+PROCESS_POOL_WORKERS = int(os.environ.get('PROCESS_POOL_WORKERS', 0))  # プロセスプールのワーカー数。0ならCPUコア数
+PROCESS_POOL_PRELOAD = os.environ.get('PROCESS_POOL_PRELOAD', '{{:Pythonパッケージ名:}}')  # ワーカープロセスであらかじめimportするモジュール(カンマ区切り)
+PROCESS_POOL_WARM_START = int(os.environ.get('PROCESS_POOL_WARM_START', 1))  # 1なら起動時にワーカープロセスを起動しておく
+PROCESS_POOL_SHM_THRESHOLD = int(os.environ.get('PROCESS_POOL_SHM_THRESHOLD', 1024 * 1024))  # このサイズ(バイト)以上の配列は共有メモリで渡す
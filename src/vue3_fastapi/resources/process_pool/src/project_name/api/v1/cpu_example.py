@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Query
+from pathlib import Path
+from typing import Annotated
+import math
+from ...process_pool import offload
+
+# NOTE: @offloadを付けた関数はプロセスプールで実行される(モジュールレベルで定義すること)。
+
+@offload
+def cosine_curve(n: Annotated[int, Query(ge=1, le=10_000)] = 20) -> dict:
+    x = [2 * math.pi * i / n for i in range(n + 1)]
+    y = [math.cos(i) for i in x]
+    return {'x': x, 'y': y, 'type': 'scatter', 'mode': 'lines+markers', 'name': 'Cosine Curve'}
+
+@offload
+def sum_of_squares(n: int) -> float:
+    # データの作成もCPU処理のため、イベントループではなくワーカープロセスで行う
+    return math.fsum(float(i) * i for i in range(n))
+
+def create_router(base_path: Path) -> APIRouter:
+    # MARK: /api/v1/cpu-example
+    router = APIRouter(prefix="/cpu-example", tags=['cpu-example'])
+
+    # MARK: /api/v1/cpu-example/cosine-curve
+    # @offloadを付けた関数はasync defの関数になるため、そのままエンドポイントとして登録できる
+    router.get("/cosine-curve")(cosine_curve)
+
+    # MARK: /api/v1/cpu-example/sum-of-squares
+    @router.get("/sum-of-squares")
+    async def get_sum_of_squares(n: Annotated[int, Query(ge=0, le=10_000_000)] = 1_000_000):
+        return {"n": n, "sum_of_squares": await sum_of_squares(n)}
+
+    return router
@@ -0,0 +1,212 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Awaitable, Callable, ParamSpec, TypeVar
+import array
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+from .common import metrics
+from .common import settings
+from .common.logger import logger
+
+'''
+    # CPU処理をProcessPoolExecutorで実行するモジュール。
+    # syncのdefで実装したCPU処理はスレッドプールで実行されるが、GILを保持するため他のリクエストの処理も遅くなる。
+    # @offloadを付けた関数はプロセスプールで実行され、イベントループとスレッドプールをブロックしない。
+    #
+    # - ワーカープロセスはforkserver(使用できない環境ではspawn)で起動し、
+    #   PROCESS_POOL_PRELOADのモジュールをあらかじめimportしておく
+    # - PROCESS_POOL_SHM_THRESHOLD以上のarray.array/numpy.ndarrayの引数はpickleせずに共有メモリで渡す
+    #   (ワーカープロセスでは、array.arrayはmemoryview、numpy.ndarrayは共有メモリ上のndarrayとして受け取る)
+    # - @offloadはモジュールレベルの関数に付けること(ワーカープロセスでモジュール名と関数名から関数を取得するため)
+
+    @offload
+    def heavy_task(values: array.array) -> float:
+        return sum(values)
+
+    # エンドポイントからawaitして呼び出す、またはそのままエンドポイントとして登録する
+    router.get("/heavy-task")(heavy_task)
+'''
+
+P = ParamSpec('P')
+R = TypeVar('R')
+
+_executor: ProcessPoolExecutor | None = None
+_start_method = ''
+_workers = 0
+_submitted = 0
+_completed = 0
+_completed_lock = threading.Lock()  # _completedはexecutorの管理スレッドからも更新する
+_max_queued = 0
+
+# MARK: shared memory
+class _SharedRef:
+    '''共有メモリに格納した配列の参照(ワーカープロセスにはこの参照だけをpickleして渡す)'''
+    def __init__(self, name: str, kind: str, dtype: str, shape: tuple[int, ...]):
+        self.name = name
+        self.kind = kind
+        self.dtype = dtype
+        self.shape = shape
+
+def _to_shared(value: Any, created: list[shared_memory.SharedMemory]) -> Any:
+    '''しきい値以上の配列を共有メモリにコピーし、_SharedRefに置き換えます。'''
+    if isinstance(value, array.array):
+        nbytes = len(value) * value.itemsize
+        if nbytes < settings.PROCESS_POOL_SHM_THRESHOLD:
+            return value
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        created.append(shm)
+        shm.buf[:nbytes] = memoryview(value).cast('B')
+        return _SharedRef(shm.name, 'array', value.typecode, (len(value), ))
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and isinstance(value, numpy.ndarray):
+        if value.nbytes < settings.PROCESS_POOL_SHM_THRESHOLD:
+            return value
+        shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        created.append(shm)
+        numpy.ndarray(value.shape, dtype=value.dtype, buffer=shm.buf)[...] = value
+        return _SharedRef(shm.name, 'ndarray', value.dtype.str, value.shape)
+    return value
+
+# ワーカープロセスで、使用中のため閉じられなかった共有メモリ
+_unclosed: list[shared_memory.SharedMemory] = []
+
+def _from_shared(value: Any, attached: list[shared_memory.SharedMemory]) -> Any:
+    '''_SharedRefを共有メモリ上の配列に戻します(ワーカープロセスで実行する)。'''
+    if not isinstance(value, _SharedRef):
+        return value
+    shm = shared_memory.SharedMemory(name=value.name)
+    attached.append(shm)
+    if value.kind == 'ndarray':
+        import numpy
+        return numpy.ndarray(value.shape, dtype=numpy.dtype(value.dtype), buffer=shm.buf)
+    itemsize = array.array(value.dtype).itemsize
+    return shm.buf[:value.shape[0] * itemsize].cast(value.dtype)
+
+def _close(shms: list[shared_memory.SharedMemory]) -> list[shared_memory.SharedMemory]:
+    '''共有メモリを閉じ、参照が残っていて閉じられなかったものを返します。'''
+    unclosed = []
+    for shm in shms:
+        try:
+            shm.close()
+        except BufferError:
+            unclosed.append(shm)
+    return unclosed
+
+# MARK: worker
+def _warm_up(modules: list[str]):
+    '''ワーカープロセスの初期化処理(モジュールをimportしておく)'''
+    for module in modules:
+        importlib.import_module(module)
+
+def _ping() -> int:
+    return os.getpid()
+
+def _invoke(module_name: str, qualname: str, args: tuple, kwargs: dict) -> Any:
+    '''ワーカープロセスで、モジュール名と関数名から関数を取得して実行します。'''
+    global _unclosed
+    _unclosed = _close(_unclosed)
+    func: Any = importlib.import_module(module_name)
+    for name in qualname.split('.'):
+        func = getattr(func, name)
+    func = getattr(func, '__wrapped__', func)
+    attached: list[shared_memory.SharedMemory] = []
+    args = tuple(_from_shared(i, attached) for i in args)
+    kwargs = {k: _from_shared(v, attached) for k, v in kwargs.items()}
+    try:
+        return func(*args, **kwargs)
+    finally:
+        del args, kwargs
+        _unclosed += _close(attached)
+
+# MARK: API
+def _unlink(shms: list[shared_memory.SharedMemory]):
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+def _on_done(created: list[shared_memory.SharedMemory], future: Future):
+    '''タスクの終了時(キャンセルを含む)に、完了数を更新して共有メモリを解放します。'''
+    global _completed
+    with _completed_lock:
+        _completed += 1
+    _unlink(created)
+
+async def run(func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    '''モジュールレベルの関数funcをプロセスプールで実行します。'''
+    global _submitted, _max_queued
+    if _executor is None:
+        raise RuntimeError('process pool is not started')
+    if '<locals>' in func.__qualname__:
+        raise ValueError(f'{func.__qualname__} is not a module-level function')
+    created: list[shared_memory.SharedMemory] = []
+    try:
+        shared_args = tuple(_to_shared(i, created) for i in args)
+        shared_kwargs = {k: _to_shared(v, created) for k, v in kwargs.items()}
+        future = _executor.submit(_invoke, func.__module__, func.__qualname__, shared_args, shared_kwargs)
+    except BaseException:
+        _unlink(created)
+        raise
+    _submitted += 1
+    _max_queued = max(_max_queued, _submitted - _completed - _workers)
+    # NOTE: 呼び出し元がキャンセルされても、ワーカープロセスに渡したタスクは止められない。
+    #       完了数の更新と共有メモリの解放は、タスクが実際に終了してから行う。
+    future.add_done_callback(functools.partial(_on_done, created))
+    return await asyncio.wrap_future(future)
+
+def offload(func: Callable[P, R]) -> Callable[P, Awaitable[R]]:
+    '''関数をプロセスプールで実行するasync関数に変換するデコレーター'''
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        return await run(func, *args, **kwargs)
+    return wrapper
+
+def statistics() -> dict:
+    '''プロセスプールの使用状況を返します。queuedはワーカープロセスの空きを待っているタスク数です。'''
+    in_flight = _submitted - _completed
+    return {
+        'start_method': _start_method, 
+        'workers': _workers, 
+        'submitted': _submitted, 
+        'completed': _completed, 
+        'in_flight': in_flight, 
+        'queued': max(0, in_flight - _workers), 
+        'max_queued': max(0, _max_queued), 
+    }
+
+metrics.register('process_pool', statistics)
+
+# MARK: lifespan
+async def start():
+    '''プロセスプールを作成し、PROCESS_POOL_WARM_STARTが1ならワーカープロセスを起動しておきます。'''
+    global _executor, _start_method, _workers
+    modules = [i.strip() for i in settings.PROCESS_POOL_PRELOAD.split(',') if i.strip()]
+    _start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    context = multiprocessing.get_context(_start_method)
+    if _start_method == 'forkserver':
+        context.set_forkserver_preload(modules)
+    _workers = settings.PROCESS_POOL_WORKERS or os.cpu_count() or 1
+    _executor = ProcessPoolExecutor(
+        max_workers=_workers, 
+        mp_context=context, 
+        initializer=_warm_up, 
+        initargs=(modules, ), 
+    )
+    if settings.PROCESS_POOL_WARM_START:
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*(loop.run_in_executor(_executor, _ping) for _ in range(_workers)))
+        logger.debug(f'process pool warmed up {_start_method=} {_workers=} {sorted(set(pids))=}')
+
+async def stop():
+    '''プロセスプールを終了します。'''
+    global _executor
+    if _executor is None:
+        return
+    executor = _executor
+    _executor = None
+    await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+    logger.debug('process pool stopped')
@@ -6,15 +6,18 @@ from . import api
 from . import frontend
 from .common.logger import logger
 from .common import settings
+from .common import threadpool
 {{:additional_imports:}}
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    threadpool.start()
     # ToDo: 初期化処理
 {{:lifespan_init:}}
     yield   # app実行中にここに到達する
 
     # ToDo: 終了処理
-{{:lifespan_exit:}}
+{{:lifespan_exit:}}    await threadpool.stop()
+
 # MARK: create an app
 def create_app(base_url: str = '') -> FastAPI:
     base_path = Path(__file__).parent.resolve()
@@ -23,7 +26,7 @@ def create_app(base_url: str = '') -> FastAPI:
     # Create an application instance
     app = FastAPI(lifespan=lifespan, root_path=base_url)
 
-    # CORS対策
+{{:additional_middlewares:}}    # CORS対策
     if settings.FRONTEND_URLS:
         origins = [i.strip().removesuffix('/') for i in settings.FRONTEND_URLS.split(',') if i.strip()]
     else:
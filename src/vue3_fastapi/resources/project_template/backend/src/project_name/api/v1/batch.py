@@ -0,0 +1,129 @@
+from fastapi import APIRouter, HTTPException, Request
+from starlette.types import ASGIApp, Message
+from pydantic import BaseModel, Field
+from pathlib import Path
+from typing import Any
+import asyncio
+import json
+from ...common import settings
+from ...common.logger import logger
+
+'''
+    # 複数のAPI呼び出しを1回のHTTPリクエストにまとめるエンドポイント。
+    # サブリクエストはHTTPを経由せず、同じASGIアプリケーションに並行してディスパッチする。
+    # ミドルウェアや依存関係(Depends)は通常のリクエストと同じように処理される。
+'''
+
+class SubRequest(BaseModel):
+    method: str = 'GET'
+    path: str = Field(description='/api/v1からの相対パス(例: /example/hello?x=1)')
+    body: Any = None
+
+class SubResponse(BaseModel):
+    status: int
+    body: Any = None
+
+class BatchRequest(BaseModel):
+    requests: list[SubRequest]
+
+class BatchResponse(BaseModel):
+    responses: list[SubResponse]
+
+# サブリクエストに引き継ぐscopeのキー(ルーティング結果などは引き継がない)
+# extensionsは引き継がない(http.response.pathsendなどはサブリクエストのsend()で扱えないため)
+_inherited_scope_keys = ('type', 'asgi', 'http_version', 'scheme', 'server', 'client', 'root_path')
+
+# サブリクエストに引き継がないヘッダー
+_excluded_headers = {b'content-length', b'content-type', b'accept-encoding', b'transfer-encoding'}
+
+async def _dispatch(request: Request, sub: SubRequest, prefix: str) -> SubResponse:
+    path, _, query = sub.path.partition('?')
+    if not path.startswith('/'):
+        path = '/' + path
+    if path.rstrip('/') == '/batch':
+        return SubResponse(status=400, body={'detail': 'Nested batch is not allowed'})
+    body = b'' if sub.body is None else json.dumps(sub.body).encode('utf-8')
+    headers = [(k, v) for k, v in request.scope['headers'] if k.lower() not in _excluded_headers]
+    if sub.body is not None:
+        headers.append((b'content-type', b'application/json'))
+    headers.append((b'content-length', str(len(body)).encode('latin-1')))
+    scope = {key: request.scope[key] for key in _inherited_scope_keys if key in request.scope}
+    scope.update({
+        'method': sub.method.upper(), 
+        'path': prefix + path, 
+        'raw_path': (prefix + path).encode('utf-8'), 
+        'query_string': query.encode('latin-1'), 
+        'headers': headers, 
+        'state': dict(request.scope.get('state', {})), 
+        'extensions': {}, 
+        'batch_subrequest': True,   # 流量制御などで親のリクエストと区別するため
+    })
+
+    app: ASGIApp = request.scope['app']
+    request_complete = False
+    response_complete = asyncio.Event()
+    status = 500
+    chunks: list[bytes] = []
+    content_type = ''
+
+    async def receive() -> Message:
+        nonlocal request_complete
+        if not request_complete:
+            request_complete = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # レスポンス完了まで切断を通知しない(StreamingResponseが中断されないようにする)
+        await response_complete.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: Message) -> None:
+        nonlocal status, content_type
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            for k, v in message.get('headers', []):
+                if k.lower() == b'content-type':
+                    content_type = v.decode('latin-1')
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        logger.exception(f'batch {sub.method} {sub.path} failed: {e}')
+        return SubResponse(status=500, body={'detail': 'Internal Server Error'})
+    finally:
+        response_complete.set()
+
+    data = b''.join(chunks)
+    if content_type.startswith('application/json'):
+        return SubResponse(status=status, body=json.loads(data) if data else None)
+    return SubResponse(status=status, body=data.decode('utf-8', errors='replace'))
+
+def create_router(base_path: Path) -> APIRouter:
+    # MARK: /api/v1/batch
+    router = APIRouter(prefix="/batch", tags=['batch'])
+
+    @router.post("", response_model=BatchResponse)
+    async def post_batch(request: Request, batch: BatchRequest):
+        if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+            raise HTTPException(status_code=413, detail=f"Too many requests (max {settings.BATCH_MAX_REQUESTS})")
+        # 流量制御(admission)が有効な場合は、サブリクエスト数の枠を確保し(確保できなければ503)、
+        # 確保できた枠の数までしか同時に実行しない
+        concurrency = len(batch.requests)
+        lease = request.scope.get('admission')
+        if lease is not None:
+            concurrency = await lease.reserve(concurrency)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        # /api/v1/batchのパスから/api/v1までのプレフィックス(root_pathを含む)を求める
+        prefix = request.scope['path'].removesuffix('/batch')
+
+        async def dispatch(sub: SubRequest) -> SubResponse:
+            async with semaphore:
+                return await _dispatch(request, sub, prefix)
+
+        responses = await asyncio.gather(*(dispatch(sub) for sub in batch.requests))
+        return BatchResponse(responses=list(responses))
+
+    return router
@@ -1,10 +1,12 @@
 from fastapi import APIRouter
 from pathlib import Path
-import threading
+import asyncio
 import math
 
 # global variables
-lock = threading.Lock()
+# NOTE: async defのエンドポイントはイベントループ上で実行されるため、asyncio.Lockで排他制御する。
+#       syncのdefで実装する場合はスレッドプールで実行されるため、threading.Lockを使うこと。
+lock = asyncio.Lock()
 counter = 0
 
 def create_router(base_path: Path) -> APIRouter:
@@ -13,23 +15,25 @@ def create_router(base_path: Path) -> APIRouter:
     
     # MARK: /api/v1/example/hello
     @router.get("/hello")
-    def get_hello():
+    async def get_hello():
         return {"message": "Hello, FastAPI!"}
     
     # MARK: /api/v1/example/counter
     @router.get("/counter")
-    def get_counter():
+    async def get_counter():
         return {"counter": counter}
     
     # MARK: /api/v1/example/count_up
     @router.get("/count_up")
-    def count_up():
-        with lock:
+    async def count_up():
+        async with lock:
             global counter
             counter += 1
             return {"counter": counter}
 
     # MARK: /api/v1/example/cosine-curve
+    # NOTE: ブロッキングする処理(CPU処理や同期I/O)はsyncのdefで実装すると、スレッドプールで実行される。
+    #       スレッドプールの上限はTHREADPOOL_TOKENSで設定する。
     @router.get("/cosine-curve")
     def consine_curve():
         x = [2 * math.pi * i / 20 for i in range(21)]
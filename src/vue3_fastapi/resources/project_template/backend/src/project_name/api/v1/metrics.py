@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+from pathlib import Path
+from ...common import metrics
+
+def create_router(base_path: Path) -> APIRouter:
+    # MARK: /api/v1/metrics
+    router = APIRouter(prefix="/metrics", tags=['metrics'])
+
+    @router.get("")
+    async def get_metrics():
+        return metrics.collect_all()
+
+    # MARK: /api/v1/metrics/{name}
+    @router.get("/{name}")
+    async def get_metric(name: str):
+        if name not in metrics.names():
+            raise HTTPException(status_code=404, detail=f"Unknown metrics: {name}")
+        return metrics.collect(name)
+
+    return router
@@ -0,0 +1,21 @@
+from typing import Any, Callable
+
+# MARK: metrics registry
+# 各モジュールはregister()で統計情報を返す関数を登録し、/api/v1/metricsで参照できるようにする。
+_collectors: dict[str, Callable[[], dict[str, Any]]] = {}
+
+def register(name: str, collector: Callable[[], dict[str, Any]]) -> None:
+    '''統計情報を返す関数をnameで登録します。'''
+    _collectors[name] = collector
+
+def names() -> list[str]:
+    '''登録済みの統計情報の名前を返します。'''
+    return list(_collectors.keys())
+
+def collect(name: str) -> dict[str, Any]:
+    '''nameで登録された統計情報を返します。未登録の場合はKeyErrorになります。'''
+    return _collectors[name]()
+
+def collect_all() -> dict[str, dict[str, Any]]:
+    '''登録済みのすべての統計情報を返します。'''
+    return {name: collector() for name, collector in _collectors.items()}
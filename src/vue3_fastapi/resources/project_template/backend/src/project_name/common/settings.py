@@ -8,3 +8,7 @@ PORT = int(os.environ.get('PORT', 8000))
 APP_DEBUG = int(os.environ.get('APP_DEBUG', "0"))
 BASE_URL = os.environ.get('BASE_URL', '/')
 FRONTEND_URLS = os.environ.get('FRONTEND_URLS', 'http://localhost:5173')   # カンマ区切りで複数のURLを指定可能
+THREADPOOL_TOKENS = int(os.environ.get('THREADPOOL_TOKENS', 40))  # syncエンドポイントを実行するスレッドプールの上限(ワーカープロセスごと)
+THREADPOOL_MONITOR_INTERVAL = float(os.environ.get('THREADPOOL_MONITOR_INTERVAL', 0))  # スレッドプールの計測間隔(秒)。0なら定期計測しない
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))  # /api/v1/batchで1回に受け付けるリクエスト数の上限
+{{:additional_settings:}}
\ No newline at end of file
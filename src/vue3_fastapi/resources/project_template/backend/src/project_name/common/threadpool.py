@@ -0,0 +1,77 @@
+import asyncio
+import time
+import anyio.to_thread
+from . import metrics
+from . import settings
+from .logger import logger
+
+'''
+    # syncの`def`で定義したエンドポイントは、Starletteがanyioのスレッドプールで実行する。
+    # スレッドプールの上限(トークン数)を超えたリクエストはトークンが空くまで待たされるため、
+    # 高負荷時には見えない待ち行列になる。
+    # このモジュールは上限をsettings.THREADPOOL_TOKENSで設定し、待ち行列の長さと待ち時間を計測する。
+'''
+
+_monitor_task: asyncio.Task | None = None
+_last_wait_time: float = 0.0
+_max_wait_time: float = 0.0
+
+def configure():
+    '''ワーカープロセスごとのスレッドプールの上限を設定します(イベントループ内で呼び出すこと)。'''
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_TOKENS
+    logger.debug(f'threadpool total_tokens={limiter.total_tokens}')
+
+def statistics() -> dict:
+    '''スレッドプールの使用状況を返します。
+    待ち時間は定期計測の結果のため、定期計測が無効な場合はNone(null)になります。'''
+    monitoring = _monitor_task is not None
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return {
+        'total_tokens': limiter.total_tokens, 
+        'borrowed_tokens': stats.borrowed_tokens, 
+        'tasks_waiting': stats.tasks_waiting, 
+        'last_wait_time': _last_wait_time if monitoring else None, 
+        'max_wait_time': _max_wait_time if monitoring else None, 
+    }
+
+async def probe() -> float:
+    '''空の処理をスレッドプールに投入し、実行開始までの待ち時間(秒)を計測します。'''
+    global _last_wait_time, _max_wait_time
+    submitted = time.perf_counter()
+    started = await anyio.to_thread.run_sync(time.perf_counter)
+    _last_wait_time = started - submitted
+    _max_wait_time = max(_max_wait_time, _last_wait_time)
+    return _last_wait_time
+
+async def _monitor(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        wait_time = await probe()
+        stats = statistics()
+        if stats['tasks_waiting'] > 0:
+            logger.warning(f'threadpool is saturated: {stats}')
+        else:
+            logger.debug(f'threadpool {stats} {wait_time=:.6f}')
+
+def start():
+    '''スレッドプールを設定し、THREADPOOL_MONITOR_INTERVALが正の値なら定期計測を開始します。'''
+    global _monitor_task
+    configure()
+    if settings.THREADPOOL_MONITOR_INTERVAL > 0:
+        _monitor_task = asyncio.create_task(_monitor(settings.THREADPOOL_MONITOR_INTERVAL))
+
+async def stop():
+    '''定期計測を停止します。'''
+    global _monitor_task
+    if _monitor_task is None:
+        return
+    _monitor_task.cancel()
+    try:
+        await _monitor_task
+    except asyncio.CancelledError:
+        pass
+    _monitor_task = None
+
+metrics.register('threadpool', statistics)
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+from html.parser import HTMLParser
 from pathlib import Path, PurePosixPath
+import anyio
+import json
 import mimetypes
 from .common.logger import logger
 
@@ -17,45 +21,141 @@ from .common.logger import logger
 
 public_path: Path = Path('public')
 index_path: Path = Path('public/index.html')
+preload_links: list[str] = []
 
 def get_mime_type(path: Path) -> str:
     mime_type, encoding = mimetypes.guess_type(path.name)
     return mime_type or 'application/octet-stream'
 
+# MARK: preload links
+class _IndexHtmlParser(HTMLParser):
+    '''index.htmlからエントリーのJS/CSSのURLを取得するパーサー'''
+    def __init__(self):
+        super().__init__()
+        self.links: list[str] = []
+        self.entry_scripts: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        attr = dict(attrs)
+        crossorigin = '; crossorigin' if 'crossorigin' in attr else ''
+        if tag == 'script' and attr.get('type') == 'module' and attr.get('src'):
+            self.entry_scripts.append(attr['src'])
+            self.links.append(f'<{attr["src"]}>; rel=modulepreload{crossorigin}')
+        elif tag == 'link' and attr.get('href'):
+            rel = (attr.get('rel') or '').lower()
+            if rel == 'stylesheet':
+                self.links.append(f'<{attr["href"]}>; rel=preload; as=style{crossorigin}')
+            elif rel == 'modulepreload':
+                self.links.append(f'<{attr["href"]}>; rel=modulepreload{crossorigin}')
+
+def _manifest_links(manifest: dict, base_url: str) -> list[str]:
+    '''Viteのmanifest.jsonからエントリーが静的にimportするチャンクとCSSのLinkを作成します。'''
+    links: list[str] = []
+    visited: set[str] = set()
+
+    def visit(key: str):
+        if key in visited or key not in manifest:
+            return
+        visited.add(key)
+        chunk = manifest[key]
+        links.append(f'<{base_url}{chunk["file"]}>; rel=modulepreload; crossorigin')
+        for css in chunk.get('css', []):
+            links.append(f'<{base_url}{css}>; rel=preload; as=style; crossorigin')
+        for i in chunk.get('imports', []):
+            visit(i)
+
+    for key, chunk in manifest.items():
+        if chunk.get('isEntry'):
+            visit(key)
+    return links
+
+def load_preload_links(public_path: Path, index_path: Path) -> list[str]:
+    '''index.htmlとViteのmanifest.json(public/.vite/manifest.json)からpreload用のLinkを作成します。'''
+    if not index_path.is_file():
+        return []
+    parser = _IndexHtmlParser()
+    parser.feed(index_path.read_text(encoding='utf-8'))
+    links = parser.links
+
+    manifest_path = public_path / '.vite/manifest.json'
+    if manifest_path.is_file() and parser.entry_scripts:
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        # index.htmlのエントリーのURLとmanifestのfileからベースURLを求める
+        entry_files = [chunk['file'] for chunk in manifest.values() if chunk.get('isEntry')]
+        for src in parser.entry_scripts:
+            for file in entry_files:
+                if src.endswith(file):
+                    links += _manifest_links(manifest, src.removesuffix(file))
+                    break
+            else:
+                continue
+            break
+
+    # 重複を除く(順序は維持する)
+    return list(dict.fromkeys(links))
+
+class IndexFileResponse(FileResponse):
+    '''index.htmlのレスポンス。preload用のLinkヘッダーを付け、サーバーが対応していれば103 Early Hintsを送信する。'''
+    def __init__(self, path: Path, links: list[str]):
+        super().__init__(path, headers={'link': ', '.join(links)} if links else None)
+        self.links = links
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if self.links and 'http.response.early_hint' in scope.get('extensions', {}):
+            await send({
+                'type': 'http.response.early_hint', 
+                'links': [i.encode('latin-1') for i in self.links], 
+            })
+        await super().__call__(scope, receive, send)
+
 def create_router(base_path: Path) -> APIRouter:
     # MARK: /
     router = APIRouter(tags=['frontend'])
 
-    global public_path, index_path
+    global public_path, index_path, preload_links
     public_path = (base_path / 'public').resolve()
     if not public_path.is_dir():
         logger.error(f'public/ does NOT exist.')
     index_path = (public_path / 'index.html').resolve()
+    vite_path = public_path / '.vite'
     if not index_path.is_file():
         logger.error(f'public/index.html does NOT exist.')
+    preload_links = load_preload_links(public_path, index_path)
+    logger.debug(f'create_router {preload_links=}')
 
     # MARK: /.well-known/*
     @router.get('/.well-known/{path:path}')
-    def handle_unknown_well_known(path: str):
+    async def handle_unknown_well_known(path: str):
         raise HTTPException(status_code=404, detail="Not implemented")
 
     # MARK: /*
+    # NOTE: ファイルの存在確認はanyio.Pathで行い、イベントループをブロックしない。
+    #       FileResponseもファイルの読み込みを非同期で行う。
     @router.get('/{path:path}')
-    def get_frontend(path: str):
+    async def get_frontend(path: str):
         logger.debug(f'get_frontend {path=}')
 
+        # 未定義のAPIにはindex.htmlを返さない
+        if path == 'api' or path.startswith('api/'):
+            raise HTTPException(status_code=404, detail="Not Found")
+
         # ローカルファイルの取得
-        local_path = (public_path / Path(PurePosixPath(path))).resolve()
+        local_path = Path(await anyio.Path(public_path / Path(PurePosixPath(path))).resolve())
         if not local_path.is_relative_to(base_path):
             raise HTTPException(status_code=403, detail="Access denied")
+        # ビルド時に生成されるmanifest.jsonなど(.vite/)は公開しない
+        if local_path.is_relative_to(vite_path):
+            raise HTTPException(status_code=404, detail="Not Found")
         logger.debug(f'get_frontend {local_path=}')
-        if local_path.is_file():
+        if await anyio.Path(local_path).is_file():
+            if local_path == index_path:
+                return IndexFileResponse(index_path, preload_links)
             logger.debug(f'get_frontend {get_mime_type(local_path)=}')
             return FileResponse(local_path, media_type=get_mime_type(local_path))
 
         # index.htmlの取得
-        if not index_path.is_file():
+        if not await anyio.Path(index_path).is_file():
             raise HTTPException(status_code=404, detail="index.html not found")
-        return FileResponse(index_path)
+        return IndexFileResponse(index_path, preload_links)
 
     return router
@@ -0,0 +1,47 @@
+// 同じtick内で呼び出されたAPIを/api/v1/batchにまとめて送信するヘルパー
+// 例: const [hello, counter] = await Promise.all([callApi('/example/hello'), callApi('/example/counter')])
+
+const batchUrl = `${import.meta.env.BASE_URL.replace(/\/$/, '')}/api/v1/batch`
+
+// 1回のPOSTにまとめる最大件数(バックエンドのBATCH_MAX_REQUESTSを超えないこと)
+export const MAX_BATCH = 20
+
+let pending = []
+
+async function send(calls) {
+  try {
+    const response = await fetch(batchUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ requests: calls.map((call) => call.request) }),
+    })
+    if (!response.ok) {
+      throw new Error(`batch: ${response.status} ${response.statusText}`)
+    }
+    const data = await response.json()
+    data.responses.forEach((res, i) => {
+      calls[i].resolve({ ok: res.status >= 200 && res.status < 300, status: res.status, body: res.body })
+    })
+  } catch (error) {
+    calls.forEach((call) => call.reject(error))
+  }
+}
+
+function flush() {
+  const calls = pending
+  pending = []
+  for (let i = 0; i < calls.length; i += MAX_BATCH) {
+    send(calls.slice(i, i + MAX_BATCH))
+  }
+}
+
+// pathは/api/v1からの相対パス(例: '/example/hello')
+// 戻り値は{ ok, status, body }
+export function callApi(path, method = 'GET', body = undefined) {
+  return new Promise((resolve, reject) => {
+    if (pending.length === 0) {
+      queueMicrotask(flush)
+    }
+    pending.push({ request: { method, path, body }, resolve, reject })
+  })
+}
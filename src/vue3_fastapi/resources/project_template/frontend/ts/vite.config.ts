@@ -30,6 +30,7 @@ export default defineConfig(({ mode }) => {
         new URL(env.BUILD_DIR || "./dist", import.meta.url)
       ),
       emptyOutDir: true, // ビルド時にフォルダーを空にする(以前のjsファイルなどが残るため)
+      manifest: true, // backendのfrontend.pyが.vite/manifest.jsonを読み込み、preload用のLinkヘッダーを作成する
       chunkSizeWarningLimit: 1024 * 1024 * 10, // 10MiB
     },
     resolve: {
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+'''Dockerイメージのサイズと起動時間(コンテナ起動からAPIが応答するまでの時間)を比較します。
+
+    # Dockerfileのバイトコード事前コンパイルあり/なしの2つのイメージをビルドして比較する
+    python3 scripts/compare_image.py
+
+    # ビルド済みのイメージを比較する(例: 以前のDockerfileでビルドしたイメージ)
+    python3 scripts/compare_image.py --no-build --image {{:新規作成するプロジェクト名(小文字):}}:old --image {{:新規作成するプロジェクト名(小文字):}}:latest
+'''
+from pathlib import Path
+import argparse
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+project_dir = Path(__file__).resolve().parent.parent
+default_repository = '{{:新規作成するプロジェクト名(小文字):}}'
+
+# ビルドするイメージのタグとbuild-arg
+build_variants = {
+    'bytecode': {'COMPILE_BYTECODE': '1'}, 
+    'no-bytecode': {'COMPILE_BYTECODE': '0'}, 
+}
+
+def docker(*args: str, capture: bool = True) -> str:
+    result = subprocess.run(['docker', *args], check=True, capture_output=capture, text=True)
+    return result.stdout.strip() if capture else ''
+
+def build(image: str, build_args: dict[str, str]):
+    args = ['build', '-t', image]
+    for key, value in build_args.items():
+        args += ['--build-arg', f'{key}={value}']
+    print(f'build {image} {build_args}')
+    docker(*args, str(project_dir), capture=False)
+
+def image_size(image: str) -> int:
+    return int(docker('image', 'inspect', '-f', '{{.Size}}', image))
+
+def measure_startup(image: str, path: str, timeout: float) -> float:
+    '''コンテナを起動し、pathが200を返すまでの時間(秒)を計測します。'''
+    start = time.perf_counter()
+    container = docker('run', '-d', '--rm', '-p', '127.0.0.1::8000', image)
+    try:
+        port = docker('port', container, '8000/tcp').splitlines()[0].rsplit(':', 1)[1]
+        url = f'http://127.0.0.1:{port}{path}'
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f'{image} did not respond within {timeout} seconds')
+    finally:
+        subprocess.run(['docker', 'rm', '-f', container], capture_output=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', action='append', default=[], help='比較するイメージ(複数指定可能)')
+    parser.add_argument('--no-build', action='store_true', help='イメージをビルドしない')
+    parser.add_argument('--repeat', type=int, default=5, help='起動時間の計測回数')
+    parser.add_argument('--path', default='/api/v1/example/hello', help='起動確認に使うURLパス')
+    parser.add_argument('--timeout', type=float, default=60.0, help='起動を待つ時間(秒)')
+    args = parser.parse_args()
+
+    images: list[str] = args.image
+    if not args.no_build:
+        for tag, build_args in build_variants.items():
+            image = f'{default_repository}:{tag}'
+            build(image, build_args)
+            images.append(image)
+    if not images:
+        parser.error('比較するイメージがありません。')
+
+    results = []
+    for image in images:
+        times = [measure_startup(image, args.path, args.timeout) for _ in range(args.repeat)]
+        results.append((image, image_size(image), times))
+        print(f'measured {image}: {", ".join(f"{i:.3f}" for i in times)}')
+
+    print()
+    print(f'{"image":<40} {"size (MB)":>10} {"startup median (s)":>19} {"startup min (s)":>16}')
+    for image, size, times in results:
+        print(f'{image:<40} {size / 1024 / 1024:>10.1f} {statistics.median(times):>19.3f} {min(times):>16.3f}')
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,8 @@
 from pathlib import Path
 import re
 
-def copy_file_with_variables(src_path: Path, dst_path: Path, variables: dict):
-    '''変数展開を行ってファイルをコピーします。'''
+def read_file_with_variables(src_path: Path, variables: dict) -> str:
+    '''変数展開を行ってファイルを読み込みます。'''
     with open(src_path, 'r') as f:
         content = f.read()
     for key, value in variables.items():
@@ -10,6 +10,11 @@ def copy_file_with_variables(src_path: Path, dst_path: Path, variables: dict):
     m = re.search(r'{{:.*:}}', content)
     if m:
         raise ValueError(f'{src_path}は未知の変数が含まれています: {m.group(0)}')
+    return content
+
+def copy_file_with_variables(src_path: Path, dst_path: Path, variables: dict):
+    '''変数展開を行ってファイルをコピーします。'''
+    content = read_file_with_variables(src_path, variables)
     dst_path.parent.mkdir(parents=True, exist_ok=True)
     with open(dst_path, 'w') as f:
         f.write(content)